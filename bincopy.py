@@ -4,13 +4,12 @@
 """
 
 import re
-import copy
 import binascii
 import string
+import struct
 import sys
 import argparse
 from collections import namedtuple
-from io import StringIO
 from io import BytesIO
 
 from humanfriendly import format_size
@@ -36,6 +35,57 @@ IHEX_START_LINEAR_ADDRESS = 5
 # TI-TXT defines
 TI_TXT_BYTES_PER_LINE = 16
 
+# Motorola S-Record address width in bytes per record type.
+_SREC_ADDRESS_WIDTH = {
+    '0': 2, '1': 2, '5': 2, '9': 2,
+    '2': 3, '6': 3, '8': 3,
+    '3': 4, '7': 4
+}
+
+# Color and description of each Motorola S-Record type.
+_SREC_PRETTY = {
+    '0': ('\033[0;92m', ' (header)'),
+    '1': ('\033[0;32m', ' (data)'),
+    '2': ('\033[0;32m', ' (data)'),
+    '3': ('\033[0;32m', ' (data)'),
+    '5': ('\033[0;93m', ' (count)'),
+    '6': ('\033[0;93m', ' (count)'),
+    '7': ('\033[0;96m', ' (start address)'),
+    '8': ('\033[0;96m', ' (start address)'),
+    '9': ('\033[0;96m', ' (start address)')
+}
+
+# Big endian words of common sizes in array output.
+_ARRAY_WORD_STRUCTS = {
+    2: struct.Struct('>H'),
+    4: struct.Struct('>I'),
+    8: struct.Struct('>Q')
+}
+
+# Intel HEX record size, address and type.
+_IHEX_HEADER = struct.Struct('>BHB')
+
+# The Intel HEX end of file record never changes.
+_IHEX_END_OF_FILE_RECORD = ':00000001FF'
+
+# Hexdump text representation of each byte value.
+_HEXDUMP_TEXT_TABLE = bytes(
+    byte
+    if chr(byte) == ' ' or (chr(byte) in string.printable
+                            and chr(byte) not in string.whitespace)
+    else ord('.')
+    for byte in range(256))
+
+# Info header representation of each byte value.
+_INFO_HEADER_ESCAPE = tuple(
+    chr(byte) if chr(byte) in string.printable else f'\\x{byte:02x}'
+    for byte in range(256))
+
+# C and C++ style comments and string literals.
+_COMMENT_RE = re.compile(
+    r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
+    re.DOTALL | re.MULTILINE)
+
 
 class Error(Exception):
     """Bincopy base exception.
@@ -55,16 +105,20 @@ class AddDataError(Error):
     pass
 
 
+def _crc_srec(value):
+    return ~sum(value) & 0xff
+
+
+def _crc_ihex(value):
+    return -sum(value) & 0xff
+
+
 def crc_srec(hexstr):
     """Calculate the CRC for given Motorola S-Record hexstring.
 
     """
 
-    crc = sum(binascii.unhexlify(hexstr))
-    crc &= 0xff
-    crc ^= 0xff
-
-    return crc
+    return _crc_srec(binascii.unhexlify(hexstr))
 
 
 def crc_ihex(hexstr):
@@ -72,11 +126,7 @@ def crc_ihex(hexstr):
 
     """
 
-    crc = sum(binascii.unhexlify(hexstr))
-    crc &= 0xff
-    crc = ((~crc + 1) & 0xff)
-
-    return crc
+    return _crc_ihex(binascii.unhexlify(hexstr))
 
 
 def pack_srec(type_, address, size, data):
@@ -84,26 +134,33 @@ def pack_srec(type_, address, size, data):
 
     """
 
-    if type_ in '0159':
-        line = f'{size + 2 + 1:02X}{address:04X}'
-    elif type_ in '268':
-        line = f'{size + 3 + 1:02X}{address:06X}'
-    elif type_ in '37':
-        line = f'{size + 4 + 1:02X}{address:08X}'
-    else:
+    width = _SREC_ADDRESS_WIDTH.get(type_)
+
+    if width is None:
         raise Error(f"expected record type 0..3 or 5..9, but got '{type_}'")
 
-    if data:
-        line += binascii.hexlify(data).decode('ascii').upper()
+    try:
+        value = bytearray((size + width + 1, ))
+    except ValueError:
+        raise Error(
+            f"expected data size 0..{255 - width - 1}, but got {size}")
+
+    try:
+        value += address.to_bytes(width, 'big')
+    except OverflowError:
+        raise Error(
+            f"expected address 0..{(1 << (8 * width)) - 1:#x}, but got "
+            f"{address:#x}")
 
-    return f'S{type_}{line}{crc_srec(line):02X}'
+    if data:
+        value += data
 
+    value.append(_crc_srec(value))
 
-def unpack_srec(record):
-    """Unpack given Motorola S-Record record into variables.
+    return f'S{type_}{value.hex().upper()}'
 
-    """
 
+def _unpack_srec(record, verify_crc):
     # Minimum STSSCC, where T is type, SS is size and CC is crc.
     if len(record) < 6:
         raise Error(f"record '{record}' too short")
@@ -111,7 +168,7 @@ def unpack_srec(record):
     if record[0] != 'S':
         raise Error(f"record '{record}' not starting with an 'S'")
 
-    value = bytearray.fromhex(record[2:])
+    value = binascii.unhexlify(record[2:])
     size = value[0]
 
     if size != len(value) - 1:
@@ -119,22 +176,21 @@ def unpack_srec(record):
 
     type_ = record[1]
 
-    if type_ in '0159':
-        width = 2
-    elif type_ in '268':
-        width = 3
-    elif type_ in '37':
-        width = 4
-    else:
+    width = _SREC_ADDRESS_WIDTH.get(type_)
+
+    if width is None:
         raise Error(f"expected record type 0..3 or 5..9, but got '{type_}'")
 
     data_offset = (1 + width)
     address = int.from_bytes(value[1:data_offset], byteorder='big')
     data = value[data_offset:-1]
-    actual_crc = value[-1]
-    expected_crc = crc_srec(record[2:-2])
 
-    if actual_crc != expected_crc:
+    # The sum of all bytes, including the CRC, is 0xff in a valid
+    # record.
+    if verify_crc and sum(value) & 0xff != 0xff:
+        actual_crc = value[-1]
+        expected_crc = _crc_srec(value[:-1])
+
         raise Error(
             f"expected crc '{expected_crc:02X}' in record {record}, but got "
             f"'{actual_crc:02X}'")
@@ -142,24 +198,42 @@ def unpack_srec(record):
     return (type_, address, len(data), data)
 
 
+def unpack_srec(record, verify_crc=True):
+    """Unpack given Motorola S-Record record into variables. Set
+    `verify_crc` to ``False`` to skip the CRC check.
+
+    """
+
+    type_, address, size, data = _unpack_srec(record, verify_crc)
+
+    return (type_, address, size, bytearray(data))
+
+
 def pack_ihex(type_, address, size, data):
     """Create a Intel HEX record of given data.
 
     """
 
-    line = f'{size:02X}{address:04X}{type_:02X}'
+    try:
+        value = bytearray(_IHEX_HEADER.pack(size, address, type_))
+    except struct.error:
+        if not 0 <= size <= 255:
+            raise Error(f"expected data size 0..255, but got {size}")
+        elif not 0 <= address <= 0xffff:
+            raise Error(
+                f"expected address 0..0xffff, but got {address:#x}")
+        else:
+            raise Error(f"expected record type 0..255, but got {type_}")
 
     if data:
-        line += binascii.hexlify(data).decode('ascii').upper()
+        value += data
 
-    return f':{line}{crc_ihex(line):02X}'
+    value.append(_crc_ihex(value))
 
+    return f':{value.hex().upper()}'
 
-def unpack_ihex(record):
-    """Unpack given Intel HEX record into variables.
-
-    """
 
+def _unpack_ihex(record, verify_crc):
     # Minimum :SSAAAATTCC, where SS is size, AAAA is address, TT is
     # type and CC is crc.
     if len(record) < 11:
@@ -168,19 +242,20 @@ def unpack_ihex(record):
     if record[0] != ':':
         raise Error(f"record '{record}' not starting with a ':'")
 
-    value = bytearray.fromhex(record[1:])
-    size = value[0]
+    value = binascii.unhexlify(record[1:])
+    size, address, type_ = _IHEX_HEADER.unpack_from(value)
 
     if size != len(value) - 5:
         raise Error(f"record '{record}' has wrong size")
 
-    address = int.from_bytes(value[1:3], byteorder='big')
-    type_ = value[3]
     data = value[4:-1]
-    actual_crc = value[-1]
-    expected_crc = crc_ihex(record[1:-2])
 
-    if actual_crc != expected_crc:
+    # The sum of all bytes, including the CRC, is 0x00 in a valid
+    # record.
+    if verify_crc and sum(value) & 0xff != 0:
+        actual_crc = value[-1]
+        expected_crc = _crc_ihex(value[:-1])
+
         raise Error(
             f"expected crc '{expected_crc:02X}' in record {record}, but got "
             f"'{actual_crc:02X}'")
@@ -188,6 +263,17 @@ def unpack_ihex(record):
     return (type_, address, size, data)
 
 
+def unpack_ihex(record, verify_crc=True):
+    """Unpack given Intel HEX record into variables. Set `verify_crc` to
+    ``False`` to skip the CRC check.
+
+    """
+
+    type_, address, size, data = _unpack_ihex(record, verify_crc)
+
+    return (type_, address, size, bytearray(data))
+
+
 def pretty_srec(record):
     """Make given Motorola S-Record pretty by adding colors to it.
 
@@ -195,45 +281,13 @@ def pretty_srec(record):
 
     type_ = record[1:2]
 
-    if type_ == '0':
-        width = 4
-        type_color = '\033[0;92m'
-        type_text = ' (header)'
-    elif type_ in '1':
-        width = 4
-        type_color = '\033[0;32m'
-        type_text = ' (data)'
-    elif type_ in '2':
-        width = 6
-        type_color = '\033[0;32m'
-        type_text = ' (data)'
-    elif type_ in '3':
-        width = 8
-        type_color = '\033[0;32m'
-        type_text = ' (data)'
-    elif type_ in '5':
-        width = 4
-        type_color = '\033[0;93m'
-        type_text = ' (count)'
-    elif type_ in '6':
-        width = 6
-        type_color = '\033[0;93m'
-        type_text = ' (count)'
-    elif type_ in '7':
-        width = 8
-        type_color = '\033[0;96m'
-        type_text = ' (start address)'
-    elif type_ in '8':
-        width = 6
-        type_color = '\033[0;96m'
-        type_text = ' (start address)'
-    elif type_ in '9':
-        width = 4
-        type_color = '\033[0;96m'
-        type_text = ' (start address)'
-    else:
+    try:
+        type_color, type_text = _SREC_PRETTY[type_]
+    except KeyError:
         raise Error(f"expected record type 0..3 or 5..9, but got '{type_}'")
 
+    width = 2 * _SREC_ADDRESS_WIDTH[type_]
+
     return (type_color + record[:2]
             + '\033[0;95m' + record[2:4]
             + '\033[0;33m' + record[4:4 + width]
@@ -303,16 +357,16 @@ def comment_remover(text):
         else:
             return s
 
-    pattern = re.compile(
-        r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-        re.DOTALL | re.MULTILINE)
+    # All comments start with a slash, and strings are kept as is.
+    if '/' not in text:
+        return text
 
-    return re.sub(pattern, replacer, text)
+    return _COMMENT_RE.sub(replacer, text)
 
 
 def is_srec(records):
     try:
-        unpack_srec(records.partition('\n')[0].rstrip())
+        _unpack_srec(records.partition('\n')[0].rstrip(), True)
     except Error:
         return False
     else:
@@ -321,7 +375,7 @@ def is_srec(records):
 
 def is_ihex(records):
     try:
-        unpack_ihex(records.partition('\n')[0].rstrip())
+        _unpack_ihex(records.partition('\n')[0].rstrip(), True)
     except Error:
         return False
     else:
@@ -387,11 +441,13 @@ class Segment:
         address = self.minimum_address
         data = self.data
 
-        # Apply padding to first and final chunk, if padding is non-empty.
-        align_offset = address % alignment
-        address -= align_offset * bool(padding)
-        data = align_offset // self.word_size_bytes * padding + data
-        data += (alignment - len(data)) % alignment // self.word_size_bytes * padding
+        # Apply padding to first and final chunk, if padding is
+        # non-empty. Without padding the segment data is sliced as is.
+        if padding:
+            align_offset = address % alignment
+            address -= align_offset
+            data = align_offset // self.word_size_bytes * padding + data
+            data += (alignment - len(data)) % alignment // self.word_size_bytes * padding
 
         # First chunk may be non-aligned and shorter than `size` if padding is empty.
         chunk_offset = (address % alignment)
@@ -402,12 +458,10 @@ class Segment:
                           address + size,
                           data[:first_chunk_size],
                           self.word_size_bytes)
-            address += first_chunk_size
-            data = data[first_chunk_size:]
         else:
             first_chunk_size = 0
 
-        for offset in range(0, len(data), size):
+        for offset in range(first_chunk_size, len(data), size):
             yield Segment(address + offset,
                           address + offset + size,
                           data[offset:offset + size],
@@ -421,35 +475,35 @@ class Segment:
 
         if minimum_address == self.maximum_address:
             self.maximum_address = maximum_address
-            self.data += data
+            self.data.extend(data)
         elif maximum_address == self.minimum_address:
             self.minimum_address = minimum_address
-            self.data = data + self.data
+            self.data[:0] = data
         elif (overwrite
               and minimum_address < self.maximum_address
               and maximum_address > self.minimum_address):
+            # Slice the added data without copying it.
+            data = memoryview(data)
             self_data_offset = minimum_address - self.minimum_address
 
             # Prepend data.
             if self_data_offset < 0:
                 self_data_offset *= -1
-                self.data = data[:self_data_offset] + self.data
-                del data[:self_data_offset]
+                self.data[:0] = data[:self_data_offset]
+                data = data[self_data_offset:]
                 self.minimum_address = minimum_address
 
             # Overwrite overlapping part.
             self_data_left = len(self.data) - self_data_offset
+            data_size = len(data)
 
-            if len(data) <= self_data_left:
-                self.data[self_data_offset:self_data_offset + len(data)] = data
-                data = bytearray()
+            if data_size <= self_data_left:
+                self.data[self_data_offset:self_data_offset + data_size] = data
             else:
                 self.data[self_data_offset:] = data[:self_data_left]
-                data = data[self_data_left:]
 
-            # Append data.
-            if len(data) > 0:
-                self.data += data
+                # Append data.
+                self.data.extend(data[self_data_left:])
                 self.maximum_address = maximum_address
         else:
             raise AddDataError(
@@ -474,38 +528,39 @@ class Segment:
 
         remove_size = maximum_address - minimum_address
         part1_size = minimum_address - self.minimum_address
-        part1_data = self.data[0:part1_size]
-        part2_data = self.data[part1_size + remove_size:]
+        part2_size = self.maximum_address - maximum_address
 
-        if len(part1_data) and len(part2_data):
+        if part1_size > 0 and part2_size > 0:
             # Update this segment and return the second segment.
-            self.maximum_address = self.minimum_address + part1_size
-            self.data = part1_data
+            part2_data = self.data[part1_size + remove_size:]
+            self.maximum_address = minimum_address
+            self.data = self.data[:part1_size]
 
             return Segment(maximum_address,
-                           maximum_address + len(part2_data),
+                           maximum_address + part2_size,
                            part2_data,
                            self.word_size_bytes)
         else:
             # Update this segment.
-            if len(part1_data) > 0:
+            if part1_size > 0:
                 self.maximum_address = minimum_address
-                self.data = part1_data
-            elif len(part2_data) > 0:
+                self.data = self.data[:part1_size]
+            elif part2_size > 0:
                 self.minimum_address = maximum_address
-                self.data = part2_data
+                self.data = self.data[part1_size + remove_size:]
             else:
                 self.maximum_address = self.minimum_address
                 self.data = bytearray()
 
     def __eq__(self, other):
         if isinstance(other, tuple):
-            return self.address, self.data == other
+            return (self.address, self.data) == other
         elif isinstance(other, Segment):
+            # Compare the data last as it is the most expensive.
             return ((self.minimum_address == other.minimum_address)
                     and (self.maximum_address == other.maximum_address)
-                    and (self.data == other.data)
-                    and (self.word_size_bytes == other.word_size_bytes))
+                    and (self.word_size_bytes == other.word_size_bytes)
+                    and (self.data == other.data))
         else:
             return False
 
@@ -543,8 +598,7 @@ class Segments:
 
         """
 
-        for segment in self._list:
-            yield segment
+        return iter(self._list)
 
     def __getitem__(self, index):
         try:
@@ -576,6 +630,46 @@ class Segments:
 
         return self._list[-1].maximum_address
 
+    def _find(self, address):
+        """Return the index of the first segment with maximum address
+        greater than or equal to given address, or the number of
+        segments if there is no such segment.
+
+        """
+
+        low = 0
+        high = len(self._list)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._list[middle].maximum_address < address:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _insert(self, index, segment):
+        # Data is merged into stored segments, so their data must be
+        # mutable. Segments merged into others are never copied here.
+        if not isinstance(segment.data, bytearray):
+            segment.data = bytearray(segment.data)
+
+        self._list.insert(index, segment)
+
+    def _check_next(self, index, segment):
+        """Raise an error if given segment, appended to the segment at
+        given index, overlaps the next segment.
+
+        """
+
+        if index + 1 < len(self._list):
+            if segment.maximum_address > self._list[index + 1].minimum_address:
+                raise AddDataError(
+                    'data added to a segment must be adjacent to or overlapping '
+                    'with the original segment data')
+
     def add(self, segment, overwrite=False):
         """Add segments by ascending address.
 
@@ -584,24 +678,29 @@ class Segments:
         if self._list:
             if segment.minimum_address == self._current_segment.maximum_address:
                 # Fast insertion for adjacent segments.
-                self._current_segment.add_data(segment.minimum_address,
-                                               segment.maximum_address,
-                                               segment.data,
-                                               overwrite)
+                if not overwrite:
+                    self._check_next(self._current_segment_index, segment)
+
+                # Append directly, as the data is adjacent.
+                self._current_segment.data += segment.data
+                self._current_segment.maximum_address = segment.maximum_address
             else:
-                # Linear insert.
-                for i, s in enumerate(self._list):
-                    if segment.minimum_address <= s.maximum_address:
-                        break
+                # Binary search insert.
+                i = self._find(segment.minimum_address)
 
-                if segment.minimum_address > s.maximum_address:
+                if i == len(self._list):
                     # Non-overlapping, non-adjacent after.
-                    self._list.append(segment)
-                elif segment.maximum_address < s.minimum_address:
+                    self._insert(i, segment)
+                elif segment.maximum_address < self._list[i].minimum_address:
                     # Non-overlapping, non-adjacent before.
-                    self._list.insert(i, segment)
+                    self._insert(i, segment)
                 else:
                     # Adjacent or overlapping.
+                    s = self._list[i]
+
+                    if not overwrite and segment.minimum_address == s.maximum_address:
+                        self._check_next(i, segment)
+
                     s.add_data(segment.minimum_address,
                                segment.maximum_address,
                                segment.data,
@@ -631,14 +730,69 @@ class Segments:
                     # Segments are not overlapping, nor adjacent.
                     break
         else:
-            self._list.append(segment)
+            self._insert(0, segment)
             self._current_segment = segment
             self._current_segment_index = 0
 
+    def fill(self, value, max_words=None):
+        """Fill empty space between segments with given word value,
+        merging the segments. Empty space larger than `max_words`
+        words is not touched.
+
+        """
+
+        if not self._list:
+            return
+
+        def join(segment, parts):
+            if len(parts) > 1:
+                segment.data = bytearray().join(parts)
+
+        word_size_bytes = self.word_size_bytes
+        fill_values = {}
+        new_list = [self._list[0]]
+        parts = [self._list[0].data]
+
+        for segment in self._list[1:]:
+            previous = new_list[-1]
+            fill_size_words = ((segment.minimum_address - previous.maximum_address)
+                               // word_size_bytes)
+
+            if max_words is None or fill_size_words <= max_words:
+                # Gaps often have the same size, so reuse fill values.
+                fill_value = fill_values.get(fill_size_words)
+
+                if fill_value is None:
+                    fill_value = value * fill_size_words
+                    fill_values[fill_size_words] = fill_value
+
+                parts.append(fill_value)
+                parts.append(segment.data)
+                previous.maximum_address = segment.maximum_address
+            else:
+                join(previous, parts)
+                new_list.append(segment)
+                parts = [segment.data]
+
+        join(new_list[-1], parts)
+        self._list = new_list
+        self._current_segment = new_list[-1]
+        self._current_segment_index = len(new_list) - 1
+
     def remove(self, minimum_address, maximum_address):
+        # Removing an empty range must not split any segment.
+        if minimum_address >= maximum_address:
+            return
+
+        # Only segments ending after the minimum address and starting
+        # before the maximum address are affected.
+        begin = self._find(minimum_address + 1)
+        end = begin
         new_list = []
 
-        for segment in self._list:
+        while (end < len(self._list)
+               and self._list[end].minimum_address < maximum_address):
+            segment = self._list[end]
             split = segment.remove_data(minimum_address, maximum_address)
 
             if segment.minimum_address < segment.maximum_address:
@@ -647,7 +801,17 @@ class Segments:
             if split:
                 new_list.append(split)
 
-        self._list = new_list
+            end += 1
+
+        self._list[begin:end] = new_list
+
+        # The current segment may have been removed.
+        if self._list:
+            self._current_segment = self._list[-1]
+            self._current_segment_index = len(self._list) - 1
+        else:
+            self._current_segment = None
+            self._current_segment_index = None
 
     def chunks(self, size=32, alignment=1, padding=b''):
         """Iterate over all segments and yield chunks of the data.
@@ -759,8 +923,13 @@ class BinFile:
                 address = key.start
         else:
             address = key
-            data = hex((0x80 << (8 * self.word_size_bytes)) | data)
-            data = binascii.unhexlify(data[4:])
+
+            try:
+                data = data.to_bytes(self.word_size_bytes, 'big')
+            except OverflowError:
+                raise Error(
+                    f'word value {data} out of range for '
+                    f'{self.word_size_bits} bit words')
 
         self.add_binary(data, address, overwrite=True)
 
@@ -785,7 +954,7 @@ class BinFile:
             if key < self.minimum_address or key >= self.maximum_address:
                 raise IndexError(f'binary file index {key} out of range')
 
-            return int(binascii.hexlify(self.as_binary(key, key + 1)), 16)
+            return int.from_bytes(self.as_binary(key, key + 1), 'big')
 
 
     def __len__(self):
@@ -793,10 +962,9 @@ class BinFile:
 
         """
 
-        length = sum([len(segment.data) for segment in self.segments])
-        length //= self.word_size_bytes
+        length = sum([len(segment.data) for segment in self._segments])
 
-        return length
+        return length // self.word_size_bytes
 
     def __iadd__(self, other):
         self.add_srec(other.as_srec())
@@ -923,91 +1091,150 @@ class BinFile:
             self.add_srec(data, overwrite)
         elif is_ihex(data):
             self.add_ihex(data, overwrite)
-        elif is_ti_txt(data):
-            self.add_ti_txt(data, overwrite)
-        elif is_verilog_vmem(data):
-            self.add_verilog_vmem(data, overwrite)
         else:
-            raise UnsupportedFileFormatError()
+            # Parse TI-TXT data once into a separate binary file instead
+            # of once to detect the format and once more to add it.
+            ti_txt = BinFile(word_size_bits=self.word_size_bits)
 
-    def add_srec(self, records, overwrite=False):
+            try:
+                ti_txt.add_ti_txt(data)
+            except Exception:
+                ti_txt = None
+
+            if ti_txt is not None:
+                for segment in ti_txt._segments:
+                    self._segments.add(segment, overwrite)
+            elif is_verilog_vmem(data):
+                self.add_verilog_vmem(data, overwrite)
+            else:
+                raise UnsupportedFileFormatError()
+
+    def add_srec(self, records, overwrite=False, verify_crc=True):
         """Add given Motorola S-Records string. Set `overwrite` to ``True`` to
-        allow already added data to be overwritten.
+        allow already added data to be overwritten. Set `verify_crc` to
+        ``False`` to skip the CRC check of each record.
 
         """
 
-        for record in StringIO(records):
+        self._add_srec_records(records.splitlines(), overwrite, verify_crc)
+
+    def _add_srec_records(self, records, overwrite, verify_crc=True):
+        word_size_bytes = self.word_size_bytes
+        segments_add = self._segments.add
+
+        # Data records usually follow each other in memory, so their
+        # data is collected in a run that is added as one segment.
+        run = None
+
+        for record in records:
             record = record.strip()
 
             # Ignore blank lines.
             if not record:
                 continue
 
-            type_, address, size, data = unpack_srec(record)
+            type_, address, size, data = _unpack_srec(record, verify_crc)
 
             if type_ == '0':
                 self._header = data
             elif type_ in '123':
-                address *= self.word_size_bytes
-                self._segments.add(Segment(address,
-                                           address + size,
-                                           data,
-                                           self.word_size_bytes),
-                                   overwrite)
+                address *= word_size_bytes
+
+                if run is not None and address == run.maximum_address:
+                    run.data += data
+                    run.maximum_address += size
+                else:
+                    if run is not None:
+                        segments_add(run, overwrite)
+
+                    run = Segment(address,
+                                  address + size,
+                                  bytearray(data),
+                                  word_size_bytes)
             elif type_ in '789':
                 self.execution_start_address = address
 
-    def add_ihex(self, records, overwrite=False):
+        if run is not None:
+            segments_add(run, overwrite)
+
+    def add_ihex(self, records, overwrite=False, verify_crc=True):
         """Add given Intel HEX records string. Set `overwrite` to ``True`` to
-        allow already added data to be overwritten.
+        allow already added data to be overwritten. Set `verify_crc` to
+        ``False`` to skip the CRC check of each record.
 
         """
 
+        self._add_ihex_records(records.splitlines(), overwrite, verify_crc)
+
+    def _add_ihex_records(self, records, overwrite, verify_crc=True):
         extended_segment_address = 0
         extended_linear_address = 0
+        word_size_bytes = self.word_size_bytes
+        segments_add = self._segments.add
+
+        # Data records usually follow each other in memory, so their
+        # data is collected in a run that is added as one segment.
+        run = None
 
-        for record in StringIO(records):
+        for record in records:
             record = record.strip()
 
             # Ignore blank lines.
             if not record:
                 continue
 
-            type_, address, size, data = unpack_ihex(record)
+            type_, address, size, data = _unpack_ihex(record, verify_crc)
 
             if type_ == IHEX_DATA:
                 address = (address
                            + extended_segment_address
                            + extended_linear_address)
-                address *= self.word_size_bytes
-                self._segments.add(Segment(address,
-                                           address + size,
-                                           data,
-                                           self.word_size_bytes),
-                                   overwrite)
+                address *= word_size_bytes
+
+                if run is not None and address == run.maximum_address:
+                    run.data += data
+                    run.maximum_address += size
+                else:
+                    if run is not None:
+                        segments_add(run, overwrite)
+
+                    run = Segment(address,
+                                  address + size,
+                                  bytearray(data),
+                                  word_size_bytes)
             elif type_ == IHEX_END_OF_FILE:
                 pass
             elif type_ == IHEX_EXTENDED_SEGMENT_ADDRESS:
-                extended_segment_address = int(binascii.hexlify(data), 16)
+                extended_segment_address = int.from_bytes(data, 'big')
                 extended_segment_address *= 16
             elif type_ == IHEX_EXTENDED_LINEAR_ADDRESS:
-                extended_linear_address = int(binascii.hexlify(data), 16)
+                extended_linear_address = int.from_bytes(data, 'big')
                 extended_linear_address <<= 16
             elif type_ in [IHEX_START_SEGMENT_ADDRESS, IHEX_START_LINEAR_ADDRESS]:
-                self.execution_start_address = int(binascii.hexlify(data), 16)
+                self.execution_start_address = int.from_bytes(data, 'big')
             else:
                 raise Error(f"expected type 1..5 in record {record}, but got {type_}")
 
+        if run is not None:
+            segments_add(run, overwrite)
+
     def add_ti_txt(self, lines, overwrite=False):
         """Add given TI-TXT string `lines`. Set `overwrite` to ``True`` to
         allow already added data to be overwritten.
 
         """
 
+        self._add_ti_txt_lines(lines.splitlines(), overwrite)
+
+    def _add_ti_txt_lines(self, lines, overwrite):
         address = None
         eof_found = False
 
-        for line in StringIO(lines):
+        # Consecutive data lines are collected in a run that is added
+        # as one segment.
+        run = None
+
+        for line in lines:
             # Abort if data is found after end of file.
             if eof_found:
                 raise Error("bad file terminator")
@@ -1027,8 +1254,8 @@ class BinFile:
             else:
                 # Try to decode the data.
                 try:
-                    data = bytearray(binascii.unhexlify(line.replace(' ', '')))
-                except (TypeError, binascii.Error):
+                    data = bytes.fromhex(line)
+                except ValueError:
                     raise Error("bad data")
 
                 size = len(data)
@@ -1043,58 +1270,77 @@ class BinFile:
                 if address is None:
                     raise Error("missing section address")
 
-                self._segments.add(Segment(address,
-                                           address + size,
-                                           data,
-                                           self.word_size_bytes),
-                                   overwrite)
+                if run is not None and address == run.maximum_address:
+                    run.data += data
+                    run.maximum_address += size
+                else:
+                    if run is not None:
+                        self._segments.add(run, overwrite)
+
+                    run = Segment(address,
+                                  address + size,
+                                  bytearray(data),
+                                  self.word_size_bytes)
 
                 if size == TI_TXT_BYTES_PER_LINE:
                     address += size
                 else:
                     address = None
 
+        if run is not None:
+            self._segments.add(run, overwrite)
+
         if not eof_found:
             raise Error("missing file terminator")
 
     def add_verilog_vmem(self, data, overwrite=False):
         address = None
-        chunk = b''
-        words = re.split(r'\s+', comment_remover(data).strip())
+        chunk = []
+        chunks = []
         word_size_bytes = None
+        word_length = None
 
-        for word in words:
-            if not word.startswith('@'):
-                length = len(word)
+        def add_chunk():
+            # Decode all words in the chunk at once. Words before the
+            # first address are validated, but not added.
+            data = binascii.unhexlify(''.join(chunk))
 
-                if (length % 2) != 0:
-                    raise Error('Invalid word length.')
+            if address is not None and data:
+                chunks.append((address * word_size_bytes, data))
 
-                length //= 2
+        for word in comment_remover(data).split():
+            if word.startswith('@'):
+                add_chunk()
+                address = int(word[1:], 16)
+                chunk = []
+            else:
+                # All words have the same length, so only a word with
+                # another length than the previous ones needs checking.
+                if len(word) != word_length:
+                    length = len(word)
+
+                    if (length % 2) != 0:
+                        raise Error('Invalid word length.')
+
+                    length //= 2
+
+                    if word_size_bytes is not None:
+                        raise Error(
+                            f'Mixed word lengths {length} and {word_size_bytes}.')
 
-                if word_size_bytes is None:
                     word_size_bytes = length
-                elif length != word_size_bytes:
-                    raise Error(
-                        f'Mixed word lengths {length} and {word_size_bytes}.')
+                    word_length = len(word)
 
-        for word in words:
-            if word.startswith('@'):
-                if address is not None:
-                    self._segments.add(Segment(address,
-                                               address + len(chunk),
-                                               chunk,
-                                               self.word_size_bytes))
+                chunk.append(word)
 
-                address = int(word[1:], 16) * word_size_bytes
-                chunk = b''
-            else:
-                chunk += bytes.fromhex(word)
+        add_chunk()
 
-        if address is not None and chunk:
-            self._segments.add(Segment(address,
-                                       address + len(chunk),
-                                       chunk,
+        # Only add data once all of it has been parsed, so nothing is
+        # added if the data is invalid.
+        for minimum_address, data in chunks:
+            self._segments.add(Segment(minimum_address,
+                                       minimum_address + len(data),
+                                       data,
                                        self.word_size_bytes))
 
     def add_binary(self, data, address=0, overwrite=False):
@@ -1103,10 +1349,15 @@ class BinFile:
 
         """
 
+        # Stored segment data is always a private bytearray. Bytes are
+        # immutable and only copied if stored as a new segment.
+        if not isinstance(data, bytes):
+            data = bytearray(data)
+
         address *= self.word_size_bytes
         self._segments.add(Segment(address,
                                    address + len(data),
-                                   bytearray(data),
+                                   data,
                                    self.word_size_bytes),
                            overwrite)
 
@@ -1116,9 +1367,26 @@ class BinFile:
         """
 
         elffile = ELFFile(BytesIO(data))
+        data = memoryview(data)
 
         self.execution_start_address = elffile.header['e_entry']
 
+        # Parse the section headers once instead of once per segment,
+        # keeping only sections with data that is loaded into memory.
+        sections = []
+
+        for section in elffile.iter_sections():
+            if section['sh_size'] == 0:
+                continue
+
+            if section['sh_type'] == 'SHT_NOBITS':
+                continue
+
+            if (section['sh_flags'] & SH_FLAGS.SHF_ALLOC) == 0:
+                continue
+
+            sections.append((section['sh_offset'], section['sh_size']))
+
         for segment in elffile.iter_segments():
             if segment['p_type'] != 'PT_LOAD':
                  continue
@@ -1127,24 +1395,15 @@ class BinFile:
             segment_offset = segment['p_offset']
             segment_size = segment['p_filesz']
 
-            for section in elffile.iter_sections():
-                offset = section['sh_offset']
-                size = section['sh_size']
-                address = segment_address + offset - segment_offset
-
-                if size == 0:
-                    continue
-
+            for offset, size in sections:
                 if segment_offset <= offset < segment_offset + segment_size:
-                    if section['sh_type'] == 'SHT_NOBITS':
-                        continue
-
-                    if (section['sh_flags'] & SH_FLAGS.SHF_ALLOC) == 0:
-                        continue
+                    address = segment_address + offset - segment_offset
 
+                    # Copy section data straight from the ELF data
+                    # into a mutable segment.
                     self._segments.add(Segment(address,
                                                address + size,
-                                               data[offset:offset + size],
+                                               bytearray(data[offset:offset + size]),
                                                self.word_size_bytes),
                                        overwrite)
 
@@ -1201,7 +1460,7 @@ class BinFile:
         """
 
         with open(filename, 'r') as fin:
-            self.add_srec(fin.read(), overwrite)
+            self._add_srec_records(fin, overwrite)
 
     def add_ihex_file(self, filename, overwrite=False):
         """Open given Intel HEX file and add its records. Set `overwrite` to
@@ -1210,7 +1469,7 @@ class BinFile:
         """
 
         with open(filename, 'r') as fin:
-            self.add_ihex(fin.read(), overwrite)
+            self._add_ihex_records(fin, overwrite)
 
     def add_ti_txt_file(self, filename, overwrite=False):
         """Open given TI-TXT file and add its contents. Set `overwrite` to
@@ -1219,7 +1478,7 @@ class BinFile:
         """
 
         with open(filename, 'r') as fin:
-            self.add_ti_txt(fin.read(), overwrite)
+            self._add_ti_txt_lines(fin, overwrite)
 
     def add_verilog_vmem_file(self, filename, overwrite=False):
         """Open given Verilog VMEM file and add its contents. Set `overwrite` to
@@ -1274,41 +1533,44 @@ class BinFile:
 
         """
 
-        header = []
+        return '\n'.join(self._srec_records(number_of_data_bytes,
+                                            address_length_bits)) + '\n'
 
-        if self._header is not None:
-            record = pack_srec('0', 0, len(self._header), self._header)
-            header.append(record)
+    def _srec_records(self, number_of_data_bytes=32, address_length_bits=32):
+        """Yield the Motorola S-Records records of the binary file.
+
+        """
 
         type_ = str((address_length_bits // 8) - 1)
 
         if type_ not in '123':
             raise Error(f"expected data record type 1..3, but got {type_}")
 
-        data = [pack_srec(type_, address, len(data), data)
-                for address, data in self._segments.chunks(
-                        number_of_data_bytes // self.word_size_bytes)]
-        number_of_records = len(data)
+        if self._header is not None:
+            yield pack_srec('0', 0, len(self._header), self._header)
+
+        number_of_records = 0
+
+        for address, data in self._segments.chunks(
+                number_of_data_bytes // self.word_size_bytes):
+            yield pack_srec(type_, address, len(data), data)
+            number_of_records += 1
 
         if number_of_records <= 0xffff:
-            footer = [pack_srec('5', number_of_records, 0, None)]
+            yield pack_srec('5', number_of_records, 0, None)
         elif number_of_records <= 0xffffff:
-            footer = [pack_srec('6', number_of_records, 0, None)]
+            yield pack_srec('6', number_of_records, 0, None)
         else:
             raise Error(f'too many records {number_of_records}')
 
         # Add the execution start address.
         if self.execution_start_address is not None:
             if type_ == '1':
-                record = pack_srec('9', self.execution_start_address, 0, None)
+                yield pack_srec('9', self.execution_start_address, 0, None)
             elif type_ == '2':
-                record = pack_srec('8', self.execution_start_address, 0, None)
+                yield pack_srec('8', self.execution_start_address, 0, None)
             else:
-                record = pack_srec('7', self.execution_start_address, 0, None)
-
-            footer.append(record)
-
-        return '\n'.join(header + data + footer) + '\n'
+                yield pack_srec('7', self.execution_start_address, 0, None)
 
     def as_ihex(self, number_of_data_bytes=32, address_length_bits=32):
         """Format the binary file as Intel HEX records and return them as a
@@ -1327,6 +1589,14 @@ class BinFile:
 
         """
 
+        return '\n'.join(self._ihex_records(number_of_data_bytes,
+                                            address_length_bits)) + '\n'
+
+    def _ihex_records(self, number_of_data_bytes=32, address_length_bits=32):
+        """Yield the Intel HEX records of the binary file.
+
+        """
+
         def i32hex(address, extended_linear_address, data_address):
             if address > 0xffffffff:
                 raise Error(
@@ -1344,7 +1614,7 @@ class BinFile:
                     IHEX_EXTENDED_LINEAR_ADDRESS,
                     0,
                     2,
-                    binascii.unhexlify(f'{extended_linear_address:04X}'))
+                    extended_linear_address.to_bytes(2, 'big'))
                 data_address.append(packed)
 
             return address, extended_linear_address
@@ -1370,7 +1640,7 @@ class BinFile:
                     IHEX_EXTENDED_SEGMENT_ADDRESS,
                     0,
                     2,
-                    binascii.unhexlify(f'{extended_segment_address:04X}'))
+                    extended_segment_address.to_bytes(2, 'big'))
                 data_address.append(packed)
 
             return address_lower, extended_segment_address
@@ -1405,26 +1675,18 @@ class BinFile:
                                           address,
                                           len(data),
                                           data))
-
-        footer = []
+            yield from data_address
+            data_address.clear()
 
         if self.execution_start_address is not None:
             if address_length_bits == 24:
-                address = binascii.unhexlify(f'{self.execution_start_address:08X}')
-                footer.append(pack_ihex(IHEX_START_SEGMENT_ADDRESS,
-                                        0,
-                                        4,
-                                        address))
+                address = self.execution_start_address.to_bytes(4, 'big')
+                yield pack_ihex(IHEX_START_SEGMENT_ADDRESS, 0, 4, address)
             elif address_length_bits == 32:
-                address = binascii.unhexlify(f'{self.execution_start_address:08X}')
-                footer.append(pack_ihex(IHEX_START_LINEAR_ADDRESS,
-                                        0,
-                                        4,
-                                        address))
+                address = self.execution_start_address.to_bytes(4, 'big')
+                yield pack_ihex(IHEX_START_LINEAR_ADDRESS, 0, 4, address)
 
-        footer.append(pack_ihex(IHEX_END_OF_FILE, 0, 0, None))
-
-        return '\n'.join(data_address + footer) + '\n'
+        yield _IHEX_END_OF_FILE_RECORD
 
     def as_microchip_hex(self, number_of_data_bytes=32, address_length_bits=32):
         """Format the binary file as Microchip HEX records and return them as a
@@ -1479,7 +1741,7 @@ class BinFile:
             lines.append(f'@{segment.address:04X}')
 
             for _, data in segment.chunks(number_of_data_words):
-                lines.append(' '.join(f'{byte:02X}' for byte in data))
+                lines.append(data.hex(' ').upper())
 
         lines.append('q')
 
@@ -1493,23 +1755,14 @@ class BinFile:
         """
 
         lines = []
+        word_size_bytes = self.word_size_bytes
 
         if self._header is not None:
             lines.append(f'/* {self.header} */')
 
         for segment in self._segments:
-            for address, data in segment.chunks(32 // self.word_size_bytes):
-                words = []
-
-                for i in range(0, len(data), self.word_size_bytes):
-                    word = ''
-
-                    for byte in data[i:i + self.word_size_bytes]:
-                        word += f'{byte:02X}'
-
-                    words.append(word)
-
-                data_hex = ' '.join(words)
+            for address, data in segment.chunks(32 // word_size_bytes):
+                data_hex = data.hex(' ', word_size_bytes).upper()
                 lines.append(f'@{address:08X} {data_hex}')
 
         return '\n'.join(lines) + '\n'
@@ -1558,34 +1811,43 @@ class BinFile:
         if padding is None:
             padding = b'\xff' * self.word_size_bytes
 
-        binary = bytearray()
+        # Work with byte addresses to avoid word size conversions per
+        # segment.
+        word_size_bytes = self.word_size_bytes
+        minimum_address = current_maximum_address * word_size_bytes
+        maximum_address *= word_size_bytes
+        current_maximum_address = minimum_address
 
-        for address, data in self._segments:
-            length = len(data) // self.word_size_bytes
+        # Preallocate the largest possible result, filled with
+        # padding, and copy segment data into it.
+        size = min(maximum_address, self._segments.maximum_address) - minimum_address
+        binary = bytearray(padding * (size // word_size_bytes))
+
+        for segment in self._segments:
+            address = segment.minimum_address
+            data = segment.data
 
             # Discard data below the minimum address.
             if address < current_maximum_address:
-                if address + length <= current_maximum_address:
+                if segment.maximum_address <= current_maximum_address:
                     continue
 
-                offset = (current_maximum_address - address) * self.word_size_bytes
-                data = data[offset:]
-                length = len(data) // self.word_size_bytes
+                data = data[current_maximum_address - address:]
                 address = current_maximum_address
 
             # Discard data above the maximum address.
-            if address + length > maximum_address:
+            if address + len(data) > maximum_address:
                 if address < maximum_address:
-                    size = (maximum_address - address) * self.word_size_bytes
-                    data = data[:size]
-                    length = len(data) // self.word_size_bytes
-                elif maximum_address >= current_maximum_address:
-                    binary += padding * (maximum_address - current_maximum_address)
+                    data = data[:maximum_address - address]
+                else:
+                    current_maximum_address = maximum_address
                     break
 
-            binary += padding * (address - current_maximum_address)
-            binary += data
-            current_maximum_address = address + length
+            offset = address - minimum_address
+            binary[offset:offset + len(data)] = data
+            current_maximum_address = address + len(data)
+
+        del binary[current_maximum_address - minimum_address:]
 
         return binary
 
@@ -1616,16 +1878,27 @@ class BinFile:
 
         binary_data = self.as_binary(minimum_address,
                                      padding=padding)
-        words = []
+        word_size_bytes = self.word_size_bytes
 
-        for offset in range(0, len(binary_data), self.word_size_bytes):
-            word = 0
+        if not binary_data:
+            return ''
 
-            for byte in binary_data[offset:offset + self.word_size_bytes]:
-                word <<= 8
-                word += byte
+        if word_size_bytes == 1:
+            # Hex encode all bytes at once and then insert separators.
+            return '0x' + binary_data.hex(' ').replace(' ', separator + '0x')
 
-            words.append(f'0x{word:02x}')
+        word_struct = _ARRAY_WORD_STRUCTS.get(word_size_bytes)
+
+        if word_struct is not None:
+            words = [f'0x{word:02x}'
+                     for (word, ) in word_struct.iter_unpack(binary_data)]
+        else:
+            words = []
+
+            for offset in range(0, len(binary_data), word_size_bytes):
+                word = int.from_bytes(
+                    binary_data[offset:offset + word_size_bytes], 'big')
+                words.append(f'0x{word:02x}')
 
         return separator.join(words)
 
@@ -1640,76 +1913,115 @@ class BinFile:
 
         """
 
-        # Empty file?
-        if len(self) == 0:
-            return '\n'
+        return '\n'.join(self._hexdump_lines()) + '\n'
 
-        non_dot_characters = set(string.printable)
-        non_dot_characters -= set(string.whitespace)
-        non_dot_characters |= set(' ')
+    def _hexdump_lines(self):
+        """Yield the hexdump lines of the binary file.
 
-        def align_to_line(address):
-            return address - (address % (16 // self.word_size_bytes))
+        """
 
-        def padding(length):
-            return [None] * length
+        word_size_bytes = self.word_size_bytes
+        line_size = 16 // word_size_bytes * word_size_bytes
+        gap_size = 16 * word_size_bytes
 
-        def format_line(address, data):
-            """`data` is a list of integers and None for unused elements.
+        def format_line(address, data, ranges):
+            """`data` is 16 bytes, of which only the elements in given
+            (start, end) ranges are used. Unused elements are shown as
+            spaces.
 
             """
 
-            data += padding(16 - len(data))
-            hexdata = []
+            hexdata = data.hex(' ') + ' '
+            text = data.translate(_HEXDUMP_TEXT_TABLE).decode('ascii')
+            hexparts = []
+            textparts = []
+            position = 0
 
-            for byte in data:
-                if byte is not None:
-                    elem = f'{byte:02x}'
-                else:
-                    elem = '  '
-
-                hexdata.append(elem)
+            for start, end in ranges:
+                hexparts.append(3 * (start - position) * ' ')
+                hexparts.append(hexdata[3 * start:3 * end])
+                textparts.append((start - position) * ' ')
+                textparts.append(text[start:end])
+                position = end
 
-            first_half = ' '.join(hexdata[0:8])
-            second_half = ' '.join(hexdata[8:16])
-            text = ''
+            hexparts.append(3 * (16 - position) * ' ')
+            textparts.append((16 - position) * ' ')
+            hexdata = ''.join(hexparts)
+            text = ''.join(textparts)
 
-            for byte in data:
-                if byte is None:
-                    text += ' '
-                elif chr(byte) in non_dot_characters:
-                    text += chr(byte)
-                else:
-                    text += '.'
+            return f'{address:08x}  {hexdata[:23]}  {hexdata[24:47]}  |{text}|'
 
-            return (f'{address:08x}  {first_half:23s}  {second_half:23s}  |'
-                    f'{text:16s}|')
+        def format_full_lines(address, data):
+            """`data` is a multiple of 16 bytes. Its hex and text
+            representations are created at once and then sliced into
+            lines.
 
-        # Format one line at a time.
-        lines = []
-        line_address = align_to_line(self.minimum_address)
-        line_data = []
+            """
 
-        for chunk in self._segments.chunks(16 // self.word_size_bytes,
-                                           16 // self.word_size_bytes):
-            aligned_chunk_address = align_to_line(chunk.address)
+            hexdata = data.hex(' ')
+            text = data.translate(_HEXDUMP_TEXT_TABLE).decode('ascii')
+            line_words = 16 // word_size_bytes
 
-            if aligned_chunk_address > line_address:
-                lines.append(format_line(line_address, line_data))
+            return [
+                f'{address + i * line_words:08x}  {hexdata[48 * i:48 * i + 23]}  '
+                f'{hexdata[48 * i + 24:48 * i + 47]}  |{text[16 * i:16 * i + 16]}|'
+                for i in range(len(data) // 16)
+            ]
 
-                if aligned_chunk_address > line_address + 16:
-                    lines.append('...')
+        # Format one line at a time. Consecutive full lines are
+        # formatted directly from the segment data, while partial lines
+        # are collected in `line_data` and `line_ranges`. Addresses are
+        # in bytes.
+        line_address = None
+        line_data = None
+        line_ranges = None
 
-                line_address = aligned_chunk_address
-                line_data = []
+        for address, data in self._segments:
+            address *= word_size_bytes
+            size = len(data)
+            offset = 0
+
+            while offset < size:
+                chunk_address = address + offset
+                aligned_chunk_address = chunk_address - chunk_address % line_size
+                chunk_size = min(aligned_chunk_address + line_size - chunk_address,
+                                 size - offset)
+
+                if aligned_chunk_address != line_address:
+                    if line_data is not None:
+                        yield format_line(line_address // word_size_bytes,
+                                          line_data,
+                                          line_ranges)
+                        line_data = None
+
+                    if line_address is not None:
+                        if aligned_chunk_address > line_address + gap_size:
+                            yield '...'
+
+                    line_address = aligned_chunk_address
+
+                if chunk_size == 16:
+                    # At most 4096 lines at a time to limit memory usage.
+                    chunk_size = min((size - offset) // 16 * 16, 65536)
+                    yield from format_full_lines(chunk_address // word_size_bytes,
+                                                 data[offset:offset + chunk_size])
+                    line_address = chunk_address + chunk_size - 16
+                else:
+                    if line_data is None:
+                        line_data = bytearray(16)
+                        line_ranges = []
 
-            line_data += padding((chunk.address - line_address) * self.word_size_bytes
-                                 - len(line_data))
-            line_data += [byte for byte in chunk.data]
+                    start = chunk_address - line_address
+                    line_data[start:start + chunk_size] = data[offset:offset + chunk_size]
+                    line_ranges.append((start, start + chunk_size))
 
-        lines.append(format_line(line_address, line_data))
+                offset += chunk_size
 
-        return '\n'.join(lines) + '\n'
+        if line_data is not None:
+            yield format_line(line_address // word_size_bytes, line_data, line_ranges)
+        elif line_address is None:
+            # Empty file.
+            yield ''
 
     def fill(self, value=None, max_words=None):
         """Fill empty space between segments.
@@ -1726,28 +2038,7 @@ class BinFile:
         if value is None:
             value = b'\xff' * self.word_size_bytes
 
-        previous_segment_maximum_address = None
-        fill_segments = []
-
-        for address, data in self._segments:
-            address *= self.word_size_bytes
-            maximum_address = address + len(data)
-
-            if previous_segment_maximum_address is not None:
-                fill_size = address - previous_segment_maximum_address
-                fill_size_words = fill_size // self.word_size_bytes
-
-                if max_words is None or fill_size_words <= max_words:
-                    fill_segments.append(Segment(
-                        previous_segment_maximum_address,
-                        previous_segment_maximum_address + fill_size,
-                        value * fill_size_words,
-                        self.word_size_bytes))
-
-            previous_segment_maximum_address = maximum_address
-
-        for segment in fill_segments:
-            self._segments.add(segment)
+        self._segments.fill(value, max_words)
 
     def exclude(self, minimum_address, maximum_address):
         """Exclude given range and keep the rest.
@@ -1763,9 +2054,9 @@ class BinFile:
         if maximum_address < minimum_address:
             raise Error('bad address range')
 
-        minimum_address *= self.word_size_bytes
-        maximum_address *= self.word_size_bytes
-        self._segments.remove(minimum_address, maximum_address)
+        word_size_bytes = self.word_size_bytes
+        self._segments.remove(minimum_address * word_size_bytes,
+                              maximum_address * word_size_bytes)
 
     def crop(self, minimum_address, maximum_address):
         """Keep given range and discard the rest.
@@ -1778,11 +2069,26 @@ class BinFile:
 
         """
 
-        minimum_address *= self.word_size_bytes
-        maximum_address *= self.word_size_bytes
-        maximum_address_address = self._segments.maximum_address
-        self._segments.remove(0, minimum_address)
-        self._segments.remove(maximum_address, maximum_address_address)
+        if maximum_address < minimum_address:
+            raise Error('bad address range')
+
+        word_size_bytes = self.word_size_bytes
+        segments = self._segments
+        minimum_address *= word_size_bytes
+        maximum_address *= word_size_bytes
+
+        # Only remove data outside given range, if any.
+        segments_minimum_address = segments.minimum_address
+
+        if segments_minimum_address is not None:
+            if minimum_address > segments_minimum_address:
+                segments.remove(0, minimum_address)
+
+        segments_maximum_address = segments.maximum_address
+
+        if segments_maximum_address is not None:
+            if maximum_address < segments_maximum_address:
+                segments.remove(maximum_address, segments_maximum_address)
 
     def info(self):
         """Return a string of human readable information about the binary
@@ -1797,37 +2103,33 @@ class BinFile:
 
         """
 
-        info = ''
+        info = []
 
         if self._header is not None:
             if self._header_encoding is None:
-                header = ''
-
-                for b in self.header:
-                    if chr(b) in string.printable:
-                        header += chr(b)
-                    else:
-                        header += f'\\x{b:02x}'
+                header = ''.join([_INFO_HEADER_ESCAPE[b] for b in self._header])
             else:
                 header = self.header
 
-            info += f'Header:                  "{header}"\n'
+            info.append(f'Header:                  "{header}"\n')
 
         if self.execution_start_address is not None:
-            info += (f'Execution start address: '
-                     f'0x{self.execution_start_address:08x}\n')
+            info.append(f'Execution start address: '
+                        f'0x{self.execution_start_address:08x}\n')
 
-        info += 'Data ranges:\n\n'
+        info.append('Data ranges:\n\n')
 
-        for address, data in self._segments:
-            minimum_address = address
-            size = len(data)
-            maximum_address = (minimum_address + size // self.word_size_bytes)
-            info += 4 * ' '
-            info += (f'0x{minimum_address:08x} - 0x{maximum_address:08x} '
-                     f'({format_size(size, binary=True)})\n')
+        word_size_bytes = self.word_size_bytes
 
-        return info
+        for segment in self._segments:
+            minimum_address = segment.minimum_address
+            maximum_address = segment.maximum_address
+            size = maximum_address - minimum_address
+            info.append(f'    0x{minimum_address // word_size_bytes:08x} - '
+                        f'0x{maximum_address // word_size_bytes:08x} '
+                        f'({format_size(size, binary=True)})\n')
+
+        return ''.join(info)
 
     def layout(self):
         """Return the memory layout as a string.
@@ -1848,20 +2150,41 @@ class BinFile:
         maximum_address = hex(self.maximum_address)
         padding = ' ' * max(width - len(minimum_address) - len(maximum_address), 0)
         output = f'{minimum_address}{padding}{maximum_address}\n'
+        word_size_bytes = self.word_size_bytes
+        segments = list(self._segments)
+        index = 0
 
         for i in range(width):
-            chunk = copy.deepcopy(self)
-
             if i < (width - 1):
                 maximum_address = chunk_address + chunk_size
             else:
-                maximum_address = chunk.maximum_address
+                maximum_address = self.maximum_address
+
+            # Sum the size of the data within the chunk. Both chunks
+            # and segments are sorted by address.
+            chunk_minimum_address = chunk_address * word_size_bytes
+            chunk_maximum_address = maximum_address * word_size_bytes
+
+            while (index < len(segments)
+                   and segments[index].maximum_address <= chunk_minimum_address):
+                index += 1
 
-            chunk.crop(chunk_address, maximum_address)
+            chunk_length = 0
+            end = index
 
-            if len(chunk) == 0:
+            while (end < len(segments)
+                   and segments[end].minimum_address < chunk_maximum_address):
+                segment = segments[end]
+                chunk_length += (
+                    min(segment.maximum_address, chunk_maximum_address)
+                    - max(segment.minimum_address, chunk_minimum_address))
+                end += 1
+
+            chunk_length //= word_size_bytes
+
+            if chunk_length == 0:
                 output += ' '
-            elif len(chunk) != (maximum_address - chunk_address):
+            elif chunk_length != (maximum_address - chunk_address):
                 output += '-'
             else:
                 output += '='
@@ -2029,7 +2352,7 @@ def _do_convert(args):
 
     if args.outfile == '-':
         if isinstance(converted, str):
-            print(converted, end='')
+            sys.stdout.write(converted)
         else:
             sys.stdout.buffer.write(converted)
     else:
@@ -2049,48 +2372,50 @@ def _do_pretty(args):
             data = fin.read()
 
     if is_srec(data):
-        print('\n'.join([pretty_srec(line) for line in data.splitlines()]))
+        lines = [pretty_srec(line) for line in data.splitlines()]
     elif is_ihex(data):
-        print('\n'.join([pretty_ihex(line) for line in data.splitlines()]))
+        lines = [pretty_ihex(line) for line in data.splitlines()]
     elif is_ti_txt(data):
-        print('\n'.join([pretty_ti_txt(line) for line in data.splitlines()]))
+        lines = [pretty_ti_txt(line) for line in data.splitlines()]
     else:
         raise UnsupportedFileFormatError()
 
+    sys.stdout.write('\n'.join(lines) + '\n')
+
 
 def _do_as_srec(args):
     for binfile in args.binfile:
         bf = BinFile()
         bf.add_file(binfile)
-        print(bf.as_srec(), end='')
+        sys.stdout.write(bf.as_srec())
 
 
 def _do_as_ihex(args):
     for binfile in args.binfile:
         bf = BinFile()
         bf.add_file(binfile)
-        print(bf.as_ihex(), end='')
+        sys.stdout.write(bf.as_ihex())
 
 
 def _do_as_hexdump(args):
     for binfile in args.binfile:
         bf = BinFile()
         bf.add_file(binfile)
-        print(bf.as_hexdump(), end='')
+        sys.stdout.write(bf.as_hexdump())
 
 
 def _do_as_ti_txt(args):
     for binfile in args.binfile:
         bf = BinFile()
         bf.add_file(binfile)
-        print(bf.as_ti_txt(), end='')
+        sys.stdout.write(bf.as_ti_txt())
 
 
 def _do_as_verilog_vmem(args):
     for binfile in args.binfile:
         bf = BinFile()
         bf.add_file(binfile)
-        print(bf.as_verilog_vmem(), end='')
+        sys.stdout.write(bf.as_verilog_vmem())
 
 
 def _do_fill(args):
@@ -1,8 +1,10 @@
 from __future__ import print_function
 
+import os
 import sys
 import unittest
 import shutil
+import tempfile
 import bincopy
 from collections import namedtuple
 
@@ -79,6 +81,28 @@ class BinCopyTest(unittest.TestCase):
         self.assertEqual(str(cm.exception),
                          "expected record type 0..3 or 5..9, but got 'q'")
 
+        # Pack too big address and size.
+        with self.assertRaises(bincopy.Error) as cm:
+            bincopy.pack_srec('1', 0x10000, 0, b'')
+
+        self.assertEqual(str(cm.exception),
+                         "expected address 0..0xffff, but got 0x10000")
+
+        with self.assertRaises(bincopy.Error) as cm:
+            bincopy.pack_srec('3', 0, 251, b'')
+
+        self.assertEqual(str(cm.exception),
+                         "expected data size 0..250, but got 251")
+
+        binfile = bincopy.BinFile()
+        binfile.add_binary(b'\x01', address=0x10000)
+
+        with self.assertRaises(bincopy.Error) as cm:
+            binfile.as_srec(address_length_bits=16)
+
+        self.assertEqual(str(cm.exception),
+                         "expected address 0..0xffff, but got 0x10000")
+
         # Unpack too short record.
         with self.assertRaises(bincopy.Error) as cm:
             bincopy.unpack_srec('')
@@ -106,6 +130,26 @@ class BinCopyTest(unittest.TestCase):
         self.assertEqual(str(cm.exception),
                          "expected crc 'FD' in record S1020011, but got '11'")
 
+        # Unpack bad crc without crc verification.
+        self.assertEqual(bincopy.unpack_srec('S1020011', verify_crc=False),
+                         ('1', 0x11, 0, bytearray()))
+
+        # Unpacked data is a bytearray.
+        _, _, _, data = bincopy.unpack_srec('S10500110102E6')
+        self.assertIsInstance(data, bytearray)
+        self.assertEqual(data, bytearray(b'\x01\x02'))
+
+    def test_srec_no_crc_verification(self):
+        binfile = bincopy.BinFile()
+
+        with open('tests/files/bad_crc.s19', 'r') as fin:
+            binfile.add_srec(fin.read(), verify_crc=False)
+
+        self.assertEqual(binfile.minimum_address, 0x400264)
+        self.assertEqual(binfile.as_binary(),
+                         b'\x00\x00\x00\x00\x02\x00\x00\x00'
+                         b'\x06\x00\x00\x00\x18\x00\x00\x00')
+
     def test_ti_txt(self):
         binfile = bincopy.BinFile()
 
@@ -184,6 +228,19 @@ class BinCopyTest(unittest.TestCase):
                 raise exc
 
     def test_bad_ihex(self):
+        # Pack too big address and size.
+        with self.assertRaises(bincopy.Error) as cm:
+            bincopy.pack_ihex(0, 0x10000, 0, b'')
+
+        self.assertEqual(str(cm.exception),
+                         "expected address 0..0xffff, but got 0x10000")
+
+        with self.assertRaises(bincopy.Error) as cm:
+            bincopy.pack_ihex(0, 0, 300, b'')
+
+        self.assertEqual(str(cm.exception),
+                         "expected data size 0..255, but got 300")
+
         # Unpack.
         with self.assertRaises(bincopy.Error) as cm:
             bincopy.unpack_ihex('')
@@ -202,6 +259,19 @@ class BinCopyTest(unittest.TestCase):
         self.assertEqual(str(cm.exception),
                          "expected crc 'DE' in record :0011110022, but got '22'")
 
+        # Unpack bad crc without crc verification.
+        self.assertEqual(bincopy.unpack_ihex(':0011110022', verify_crc=False),
+                         (0, 0x1111, 0, bytearray()))
+
+        # Unpacked data is a bytearray.
+        _, _, _, data = bincopy.unpack_ihex(':020011000102EA')
+        self.assertIsInstance(data, bytearray)
+        self.assertEqual(data, bytearray(b'\x01\x02'))
+
+        binfile = bincopy.BinFile()
+        binfile.add_ihex(':0100000001FF\n:00000001FF\n', verify_crc=False)
+        self.assertEqual(binfile.as_binary(), b'\x01')
+
     def test_ihex(self):
         binfile = bincopy.BinFile()
 
@@ -607,6 +677,19 @@ class BinCopyTest(unittest.TestCase):
         with open('tests/files/hexdump3.txt') as fin:
             self.assertEqual(binfile.as_hexdump(), fin.read())
 
+    def test_hexdump_unaligned_first_segment(self):
+        binfile = bincopy.BinFile()
+        binfile.add_binary(b'hello', address=5)
+        binfile.add_binary(b'world!', address=0x40)
+
+        self.assertEqual(
+            binfile.as_hexdump(),
+            '00000000                 68 65 6c  6c 6f                    '
+            '|     hello      |\n'
+            '...\n'
+            '00000040  77 6f 72 6c 64 21                                 '
+            '|world!          |\n')
+
     def test_hexdump_empty(self):
         binfile = bincopy.BinFile()
 
@@ -752,6 +835,26 @@ class BinCopyTest(unittest.TestCase):
         self.assertEqual(str(cm.exception), 'bad address range')
         binfile.exclude(2, 2)
         self.assertEqual(binfile.as_binary(), b'111111')
+        self.assertEqual(len(binfile.segments), 1)
+
+        # Crop negative address range.
+        with self.assertRaises(bincopy.Error) as cm:
+            binfile.crop(4, 2)
+
+        self.assertEqual(str(cm.exception), 'bad address range')
+        self.assertEqual(binfile.as_binary(), b'111111')
+
+        # Add data where the most recently added segment was excluded.
+        binfile = bincopy.BinFile()
+        binfile.add_binary(b'222', address=8)
+        binfile.add_binary(b'111', address=0)
+        binfile.exclude(0, 3)
+        binfile.add_binary(b'333', address=0)
+        self.assertEqual(binfile.as_binary(),
+                         b'333' +
+                         5 * b'\xff' +
+                         b'222')
+        self.assertEqual(len(binfile.segments), 2)
 
     def test_minimum_maximum_length(self):
         binfile = bincopy.BinFile()
@@ -920,6 +1023,11 @@ class BinCopyTest(unittest.TestCase):
         binfile = bincopy.BinFile()
         binfile.add_binary(b'\x00\x01\x02\x03\x04', 2)
 
+        # Compare with address and data tuples.
+        self.assertEqual(binfile.segments[0], (2, b'\x00\x01\x02\x03\x04'))
+        self.assertNotEqual(binfile.segments[0], (2, b'\x00\x01'))
+        self.assertNotEqual(binfile.segments[0], (3, b'\x00\x01\x02\x03\x04'))
+
         # Size 4, alignment 4.
         self.assertEqual(list(binfile.segments[0].chunks(size=4, alignment=4)),
                          [
@@ -1168,6 +1276,31 @@ Data ranges:
         binfile.add_binary(1024 * b'1', address=256, overwrite=True)
         self.assertEqual(binfile.as_binary(minimum_address=256), 1024 * b'1')
 
+        # Data adjacent to one segment must not overwrite the next
+        # segment.
+        binfile = bincopy.BinFile()
+        binfile.add_binary(b'12', address=0)
+        binfile.add_binary(b'56', address=4)
+
+        with self.assertRaises(bincopy.Error):
+            binfile.add_binary(b'abc', address=2)
+
+        self.assertEqual(binfile.as_binary(), b'12\xff\xff56')
+
+        binfile.add_binary(b'abc', address=2, overwrite=True)
+        self.assertEqual(binfile.as_binary(), b'12abc6')
+
+        # Same as above, but adjacent to the most recently added
+        # segment.
+        binfile = bincopy.BinFile()
+        binfile.add_binary(b'56', address=4)
+        binfile.add_binary(b'12', address=0)
+
+        with self.assertRaises(bincopy.AddDataError):
+            binfile.add_binary(b'abc', address=2)
+
+        self.assertEqual(binfile.as_binary(), b'12\xff\xff56')
+
     def test_non_sorted_segments(self):
         binfile = bincopy.BinFile()
 
@@ -1308,6 +1441,15 @@ Data ranges:
         self.assertEqual(binfile[4:5], b'\xff\xff')
         self.assertEqual(binfile[3:8], b'\t\xa0\xff\xff\x17\x18')
 
+        # Values must fit in a word.
+        with self.assertRaises(bincopy.Error) as cm:
+            binfile[5] = 0x10000
+
+        self.assertEqual(str(cm.exception),
+                         'word value 65536 out of range for 16 bit words')
+
+        self.assertEqual(binfile[5], 0x1718)
+
     def test_header_default_encoding(self):
         binfile = bincopy.BinFile()
         binfile.add_file('tests/files/empty_main.s19')
@@ -1531,6 +1673,24 @@ Data ranges:
             command = ['bincopy', 'pretty', pretty_file.replace('.pretty', '')]
             self._test_command_line_ok(command, expected_output)
 
+    def test_command_line_empty_input(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test_file = os.path.join(tmpdir, 'empty.bin')
+
+            with open(test_file, 'w'):
+                pass
+
+            self._test_command_line_ok(['bincopy', 'as_hexdump', test_file],
+                                       '\n')
+
+            test_file = os.path.join(tmpdir, 'empty.hex.txt')
+
+            with open(test_file, 'w') as fout:
+                fout.write('q\n')
+
+            self._test_command_line_ok(['bincopy', 'pretty', test_file],
+                                       bincopy.pretty_ti_txt('q') + '\n')
+
     def test_command_line_non_existing_file(self):
         subcommands = ['info', 'as_hexdump', 'as_srec', 'as_ihex']
 
@@ -1552,6 +1712,31 @@ Data ranges:
             with self.assertRaises(IOError):
                 self._test_command_line_raises(command)
 
+    def test_command_line_address_out_of_range_no_output(self):
+        # The first records are valid, but nothing may be written when
+        # a later one fails.
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test_file = os.path.join(tmpdir, 'big.hex.txt')
+
+            with open(test_file, 'w') as fout:
+                fout.write('@0000\n01 02\n@100000000\n03 04\nq\n')
+
+            datas = [
+                ('as_srec',
+                 'error: expected address 0..0xffffffff, but got 0x100000000'),
+                ('as_ihex',
+                 'error: cannot address more than 4 GB in I32HEX files '
+                 '(32 bits addresses)')
+            ]
+
+            for subcommand, message in datas:
+                command = ['bincopy', subcommand, test_file]
+
+                with self.assertRaises(SystemExit) as cm:
+                    self._test_command_line_raises(command)
+
+                self.assertEqual(cm.exception.code, message)
+
     def test_command_line_dump_commands_one_file(self):
         test_file = 'tests/files/empty_main.s19'
         binfile = bincopy.BinFile(test_file)
@@ -1607,106 +1792,117 @@ Data ranges:
             expected_output)
 
     def test_command_line_fill(self):
-        shutil.copy('tests/files/out.hex', 'fill.hex')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fill = os.path.join(tmpdir, 'fill.hex')
+            shutil.copy('tests/files/out.hex', fill)
 
-        self._test_command_line_ok(
-            [
-                'bincopy', 'fill',
-                'fill.hex'
-            ],
-            '')
+            self._test_command_line_ok(
+                [
+                    'bincopy', 'fill',
+                    fill
+                ],
+                '')
 
-        self.assert_files_equal('fill.hex', 'tests/files/fill.hex')
+            self.assert_files_equal(fill, 'tests/files/fill.hex')
 
     def test_command_line_fill_max_words(self):
-        shutil.copy('tests/files/out.s19', 'fill_max_words.s19')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fill_max_words = os.path.join(tmpdir, 'fill_max_words.s19')
+            shutil.copy('tests/files/out.s19', fill_max_words)
 
-        self._test_command_line_ok(
-            [
-                'bincopy', 'fill',
-                '--max-words', '200',
-                'fill_max_words.s19'
-            ],
-            '')
+            self._test_command_line_ok(
+                [
+                    'bincopy', 'fill',
+                    '--max-words', '200',
+                    fill_max_words
+                ],
+                '')
 
-        self.assert_files_equal('fill_max_words.s19',
-                                'tests/files/fill_max_words.s19')
+            self.assert_files_equal(fill_max_words,
+                                    'tests/files/fill_max_words.s19')
 
     def test_command_line_fill_value(self):
-        shutil.copy('tests/files/out.hex.txt', 'fill_value.hex.txt')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fill_value = os.path.join(tmpdir, 'fill_value.hex.txt')
+            shutil.copy('tests/files/out.hex.txt', fill_value)
 
-        self._test_command_line_ok(
-            [
-                'bincopy', 'fill',
-                '--value', '0',
-                'fill_value.hex.txt'
-            ],
-            '')
+            self._test_command_line_ok(
+                [
+                    'bincopy', 'fill',
+                    '--value', '0',
+                    fill_value
+                ],
+                '')
 
-        self.assert_files_equal('fill_value.hex.txt',
-                                'tests/files/fill_value.hex.txt')
+            self.assert_files_equal(fill_value,
+                                    'tests/files/fill_value.hex.txt')
 
     def test_command_line_fill_outfile(self):
-        shutil.copy('tests/files/out.hex', 'fill_outfile.hex')
-
-        self._test_command_line_ok(
-            [
-                'bincopy', 'fill',
-                'fill_outfile.hex',
-                'fill_outfile_outfile.hex'
-            ],
-            '')
-
-        self.assert_files_equal('fill_outfile.hex', 'tests/files/out.hex')
-        self.assert_files_equal('fill_outfile_outfile.hex',
-                                'tests/files/fill_outfile_outfile.hex')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fill_outfile = os.path.join(tmpdir, 'fill_outfile.hex')
+            fill_outfile_outfile = os.path.join(tmpdir, 'fill_outfile_outfile.hex')
+            shutil.copy('tests/files/out.hex', fill_outfile)
+
+            self._test_command_line_ok(
+                [
+                    'bincopy', 'fill',
+                    fill_outfile,
+                    fill_outfile_outfile
+                ],
+                '')
+
+            self.assert_files_equal(fill_outfile, 'tests/files/out.hex')
+            self.assert_files_equal(fill_outfile_outfile,
+                                    'tests/files/fill_outfile_outfile.hex')
 
     def test_command_line_fill_stdout(self):
-        shutil.copy('tests/files/out.hex', 'fill_stdout.hex')
-
-        self._test_command_line_ok(
-            [
-                'bincopy', 'fill',
-                'fill_stdout.hex',
-                '-'
-            ],
-            ':200000007C0802A6900100049421FFF07C6C1B787C8C23783C600000386300004BFFFFE5F8\n'
-            ':20002000398000007D83637880010014382100107C0803A64E80002048656C6C6F20776F19\n'
-            ':20004000726C642E0A00FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF40\n'
-            ':20006000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFA0\n'
-            ':20008000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF80\n'
-            ':2000A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF60\n'
-            ':2000C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF40\n'
-            ':2000E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF20\n'
-            ':20010000214601360121470136007EFE09D219012146017E17C20001FF5F16002148011979\n'
-            ':20012000194E79234623965778239EDA3F01B2CA3F0156702B5E712B722B7321460134219F\n'
-            ':20014000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBF\n'
-            ':20016000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9F\n'
-            ':20018000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7F\n'
-            ':2001A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5F\n'
-            ':2001C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3F\n'
-            ':2001E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1F\n'
-            ':20020000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFE\n'
-            ':20022000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFDE\n'
-            ':20024000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBE\n'
-            ':20026000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9E\n'
-            ':20028000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7E\n'
-            ':2002A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5E\n'
-            ':2002C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3E\n'
-            ':2002E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1E\n'
-            ':20030000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFD\n'
-            ':20032000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFDD\n'
-            ':20034000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBD\n'
-            ':20036000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9D\n'
-            ':20038000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7D\n'
-            ':2003A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D\n'
-            ':2003C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3D\n'
-            ':2003E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1D\n'
-            ':0304000068656AC2\n'
-            ':0400000500000000F7\n'
-            ':00000001FF\n')
-
-        self.assert_files_equal('fill_stdout.hex', 'tests/files/out.hex')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fill_stdout = os.path.join(tmpdir, 'fill_stdout.hex')
+            shutil.copy('tests/files/out.hex', fill_stdout)
+
+            self._test_command_line_ok(
+                [
+                    'bincopy', 'fill',
+                    fill_stdout,
+                    '-'
+                ],
+                ':200000007C0802A6900100049421FFF07C6C1B787C8C23783C600000386300004BFFFFE5F8\n'
+                ':20002000398000007D83637880010014382100107C0803A64E80002048656C6C6F20776F19\n'
+                ':20004000726C642E0A00FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF40\n'
+                ':20006000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFA0\n'
+                ':20008000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF80\n'
+                ':2000A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF60\n'
+                ':2000C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF40\n'
+                ':2000E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF20\n'
+                ':20010000214601360121470136007EFE09D219012146017E17C20001FF5F16002148011979\n'
+                ':20012000194E79234623965778239EDA3F01B2CA3F0156702B5E712B722B7321460134219F\n'
+                ':20014000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBF\n'
+                ':20016000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9F\n'
+                ':20018000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7F\n'
+                ':2001A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5F\n'
+                ':2001C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3F\n'
+                ':2001E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1F\n'
+                ':20020000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFE\n'
+                ':20022000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFDE\n'
+                ':20024000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBE\n'
+                ':20026000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9E\n'
+                ':20028000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7E\n'
+                ':2002A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5E\n'
+                ':2002C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3E\n'
+                ':2002E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1E\n'
+                ':20030000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFD\n'
+                ':20032000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFDD\n'
+                ':20034000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFBD\n'
+                ':20036000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF9D\n'
+                ':20038000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7D\n'
+                ':2003A000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D\n'
+                ':2003C000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF3D\n'
+                ':2003E000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF1D\n'
+                ':0304000068656AC2\n'
+                ':0400000500000000F7\n'
+                ':00000001FF\n')
+
+            self.assert_files_equal(fill_stdout, 'tests/files/out.hex')
 
     def test_bad_word_size(self):
         with self.assertRaises(bincopy.Error) as cm:
@@ -1847,6 +2043,16 @@ Data ranges:
         with open('tests/files/empty_main.bin', 'rb') as fin:
             self.assertEqual(binfile.as_binary(padding=b'\x00'), fin.read())
 
+        # Nothing is added if the data is invalid.
+        binfile = bincopy.BinFile()
+
+        with self.assertRaises(bincopy.Error) as cm:
+            binfile.add_verilog_vmem('@0000\n01 02 03\n@0010\n04 5')
+
+        self.assertEqual(str(cm.exception), 'Invalid word length.')
+        self.assertEqual(len(binfile.segments), 0)
+        self.assertEqual(binfile.as_binary(), b'')
+
     def test_segment_len(self):
         length = 0x100
         word_size_bytes = 1